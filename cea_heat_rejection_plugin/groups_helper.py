@@ -6,8 +6,6 @@ import cea.inputlocator
 import cea.plugin
 import numpy as np
 import pandas as pd
-import geopandas as gpd
-import csv
 import os
 import warnings
 
@@ -52,32 +50,21 @@ def main(config):
         print("Buildings groups not informed, CEA will consider individual buildings for each group (unless connected to District Cooling)")
 
     #Get list of CEA buildings, separated by decentralized or centralized (district cooling) systems
-    names_decentralized = []
-    names_centralized = []
-
-    for i,row in building_supply.iterrows():
-        # Buildings that have district cooling supply are assigned to a centralized list
-        if database_supply.loc[database_supply.code == row.type_cs].scale.values == "DISTRICT":
-            names_centralized.append(row.Name)
-        # Buildings that have no district cooling supply are assigned to a decentralized list
-        else:
-            names_decentralized.append(row.Name)
+    code_to_scale = dict(zip(database_supply.code, database_supply.scale))
+    is_district = building_supply.type_cs.map(code_to_scale) == "DISTRICT"
+    # Buildings that have district cooling supply are assigned to a centralized list
+    names_centralized = building_supply.loc[is_district, 'Name'].tolist()
+    # Buildings that have no district cooling supply are assigned to a decentralized list
+    names_decentralized = building_supply.loc[~is_district, 'Name'].tolist()
 
     # Write CEA buildings groups into a group.csv file:
     locator._ensure_folder(locator.scenario, 'inputs', 'groups')
-    with open(locator.get_groups(), 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(('Group', 'Buildings'))
-        counter =0
-        while counter < len(names_decentralized):
-            group_name = 'G1' + str(counter).zfill(3)
-            writer.writerow((group_name, names_decentralized[counter]))
-            counter += 1
-        if names_centralized:
-            group_name = 'G1' + str(counter).zfill(3)
-            writer.writerow((group_name, ",".join(names_centralized)))
+    groups = [('G1' + str(counter).zfill(3), name) for counter, name in enumerate(names_decentralized)]
+    if names_centralized:
+        groups.append(('G1' + str(len(names_decentralized)).zfill(3), ",".join(names_centralized)))
+    building_groups = pd.DataFrame(groups, columns=['Group', 'Buildings'])
+    building_groups.to_csv(locator.get_groups(), index=False, lineterminator='\r\n')  # as csv.writer
 
-    building_groups = pd.read_csv(locator.get_groups())
     print("Building groups: \n", building_groups) #print table with all groups of buildings
 
 if __name__ == '__main__':
@@ -7,12 +7,12 @@ import cea.inputlocator
 import cea.plugin
 import numpy as np
 import pandas as pd
-import geopandas as gpd
 import csv
 import os
 import warnings
 
 from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor
 from cea.utilities import epwreader
 from cea.utilities.dbf import dbf_to_dataframe
 from cea.utilities.date import get_date_range_hours_from_year
@@ -21,10 +21,14 @@ from cea import MissingInputDataException
 
 from cea_heat_rejection_plugin.groups_helper import *
 from cea_heat_rejection_plugin import BASE_CT_THRESHOLD
-from cea_heat_rejection_plugin.utilities.DK_thermo import HumidAir
+from cea_heat_rejection_plugin.utilities.DK_thermo import HumidAir, getstate
 from cea_heat_rejection_plugin.utilities.coolingtowers import set_ambient, simulate_CT, parse_BldgToCTs, calc_CTheatload
 
 CT_CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'catalog.csv')
+COOLING_DEMAND_COLUMNS = ['DC_cs_kWh', 'E_cs_kWh', 'Qcs_kWh']
+DEMAND_CACHE_FOLDER = 'heat_rejection_cache'  # outside of the heat_rejection results folder
+DEMAND_CACHE_FILE = 'building_demands.npz'
+IO_WORKERS = min(8, os.cpu_count() or 1)  # threads used to read/write independent files
 
 __author__ = "Cooling Singapore (Luis Santos, Reynold Mok)"
 __copyright__ = "Copyright 2020, Architecture and Building Systems - ETH Zurich"
@@ -44,21 +48,84 @@ class HeatRejectionPlugin(cea.plugin.CeaPlugin):
     pass
 
 
-def get_building_demands(locator):
-    building_demands = pd.DataFrame()
+def read_cooling_demand(demand_file):
+    building_demand = pd.read_csv(demand_file, usecols=COOLING_DEMAND_COLUMNS)  # only parse the columns needed
+    # abs and sum over one (time x 3) buffer, without intermediate Series
+    cooling_demand = building_demand.to_numpy(dtype='f8', copy=True)
+    np.abs(cooling_demand, out=cooling_demand)  #Assuring heat rejection is positive
+    return cooling_demand.sum(axis=1)
+
+
+def read_building_demands(locator, building_names):
+    # the demand files are independent, so they are read (and parsed) in parallel
+    demand_files = [locator.get_demand_results_file(building_name) for building_name in building_names]
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as executor:
+        cooling_demands = executor.map(read_cooling_demand, demand_files)
+
+        # filled column by column into a single (time x buildings) buffer, sized with the first file
+        building_demands = None
+        for i, cooling_demand in enumerate(cooling_demands):
+            if building_demands is None:
+                building_demands = np.empty((len(cooling_demand), len(building_names)), dtype='f8')
+            building_demands[:, i] = cooling_demand
+
+    return pd.DataFrame(building_demands, columns=building_names, copy=False)
+
+
+def get_demand_file_stamp(demand_file):
+    """Returns the (size [B], modification time [ns]) of a demand results file, to tell if the cache is up to date."""
+    stat = os.stat(demand_file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def ensure_demand_cache(locator, building_names):
+    """
+    Returns the cooling demand of the buildings, read from a binary cache of previous runs. The cache is rebuilt
+    from the demand results files when it is missing, unreadable, lacks a building or when the size or modification
+    time of any of the demand results files differs from the one recorded in the cache.
 
-    for building_name in locator.get_zone_building_names():
-        building_demand = pd.read_csv(locator.get_demand_results_file(building_name))
-        cooling_demand = building_demand['DC_cs_kWh'].abs() + building_demand['E_cs_kWh'].abs() + building_demand['Qcs_kWh'].abs()  #Assuring heat rejection is positive
-        building_demands[building_name] = cooling_demand
+    The cache is kept in its own folder (outputs/data/heat_rejection_cache), apart from the heat rejection results.
+    It is a numpy .npz archive of plain arrays (demands, building names and file stamps), read without pickle.
 
-    building_demands['time'] = building_demands.index.values
+    :param locator: the InputLocator of the scenario
+    :param building_names: list of the building names to read
+    :return: DataFrame (time x buildings) of the cooling demand of each building [kWh]
+    """
+    cache_file = os.path.join(locator._ensure_folder(locator.scenario, 'outputs', 'data', DEMAND_CACHE_FOLDER),
+                              DEMAND_CACHE_FILE)
+    stamps = np.array([get_demand_file_stamp(locator.get_demand_results_file(building_name))
+                       for building_name in building_names], dtype='i8').reshape(-1, 2)
+
+    if os.path.isfile(cache_file):
+        try:
+            with np.load(cache_file, allow_pickle=False) as cache:
+                cached_demands, cached_names, cached_stamps = cache['demands'], cache['names'], cache['stamps']
+        except Exception:
+            print("The building demands cache could not be read, it will be rebuilt.")
+        else:
+            cached_columns = {name: j for j, name in enumerate(cached_names.tolist())}
+            if all(building_name in cached_columns for building_name in building_names):
+                columns = [cached_columns[building_name] for building_name in building_names]
+                if np.array_equal(cached_stamps[columns], stamps):
+                    return pd.DataFrame(cached_demands[:, columns], columns=building_names, copy=False)
+
+    building_demands = read_building_demands(locator, building_names)
+    np.savez(cache_file, demands=building_demands.to_numpy(), names=np.array(building_names, dtype=str),
+             stamps=stamps)
+    return building_demands
+
+
+def get_building_demands(locator):
+    building_demands = ensure_demand_cache(locator, list(locator.get_zone_building_names()))
+
+    building_demands['time'] = np.arange(len(building_demands))
     return building_demands
 
 
 def get_building_properties(locator):
-    zone_geometry_df = gpd.GeoDataFrame.from_file(locator.get_zone_geometry())
-    building_properties = zone_geometry_df[['Name', 'height_ag', 'floors_ag']].set_index('Name')
+    # only the attribute table (.dbf) of the zone shapefile is read, the geometries are not needed
+    zone_attributes_df = dbf_to_dataframe(os.path.splitext(locator.get_zone_geometry())[0] + '.dbf')
+    building_properties = zone_attributes_df[['Name', 'height_ag', 'floors_ag']].set_index('Name')
     return building_properties
 
 
@@ -86,21 +153,19 @@ def get_building_groups(config,locator):
     print("Building groups: \n",building_groups) #print table with all groups of buildings
     data_ct = {'Group':[],'Buildings':[]}
     data_no_ct = {'Group': [], 'Buildings': []}
-    for i, grouping in building_groups.iterrows():
-        supply_system =[]
-        building_list = grouping.Buildings.split(",")
-        for building in building_list:
-            building_supply_system = building_supply.loc[building_supply.Name == building]
-            supply_system.append(building_supply_system.type_cs.values)
+    building_type_cs = dict(zip(building_supply.Name, building_supply.type_cs))
+    for group, buildings in zip(building_groups.Group, building_groups.Buildings):
+        building_list = buildings.split(",")
+        supply_systems = {building_type_cs[building] for building in building_list}
         # Check if all buildings of the same group have the same supply system:
-        if all(x == supply_system[0] for x in supply_system):
+        if len(supply_systems) == 1:
             # Check if the buildings from a group have cooling tower:
-            if str(supply_system[0][0]) in config.heat_rejection.cooling_tower_systems:
-                data_ct['Group'].append(grouping.Group)
-                data_ct['Buildings'].append(grouping.Buildings)
+            if str(supply_systems.pop()) in config.heat_rejection.cooling_tower_systems:
+                data_ct['Group'].append(group)
+                data_ct['Buildings'].append(buildings)
             else:
-                data_no_ct['Group'].append(grouping.Group)
-                data_no_ct['Buildings'].append(grouping.Buildings)
+                data_no_ct['Group'].append(group)
+                data_no_ct['Buildings'].append(buildings)
         else:
             raise ValueError("Buildings from the same group must have the same supply system. Please check type_cs for"+str(building_list))
     building_groups_ct = pd.DataFrame(data_ct)
@@ -110,6 +175,28 @@ def get_building_groups(config,locator):
     return building_groups,building_groups_ct, building_groups_no_ct
 
 
+def get_group_demands(building_demands, building_groups):
+    """
+    Aggregates the hourly building demands into group demands. A (buildings x groups) membership matrix is built
+    once, so the summation over the buildings of every group is done in a single matrix product.
+
+    :param building_demands: DataFrame (time x buildings) of the cooling demand of each building [kWh]
+    :param building_groups: DataFrame with the columns 'Group' and 'Buildings' (comma-separated building names)
+    :return: DataFrame (time x groups) of the cooling demand of each group [kWh]
+    """
+    group_buildings = [building_list.split(',') for building_list in building_groups['Buildings']]
+    buildings = list(dict.fromkeys(building for building_list in group_buildings for building in building_list))
+    building_index = {building: i for i, building in enumerate(buildings)}
+
+    membership = np.zeros((len(buildings), len(group_buildings)), dtype='f8')
+    for group_idx, building_list in enumerate(group_buildings):
+        for building in building_list:
+            membership[building_index[building], group_idx] += 1.0
+
+    demands = building_demands[buildings].to_numpy(dtype='f8')
+    return pd.DataFrame(demands @ membership, columns=building_groups['Group'].values)
+
+
 def main(config):
     """
     This tool creates outputs of hourly heat that is rejected by each building group. Heat rejection is defined as the
@@ -145,65 +232,45 @@ def main(config):
     building_properties = get_building_properties(locator)
     building_groups, building_groups_ct, building_groups_no_ct = get_building_groups(config,locator)
 
-    # compute extra properties
-    max_load_series = pd.DataFrame({'Max_load_kWh': building_demands.max(0)})
-    min_cap_opp = pd.DataFrame({'Min_Cap_opp': building_demands.replace(0, np.NaN).min(0) / building_demands.max(0)})
-    building_demands = building_demands.replace(np.NaN, 0.0)
+    # compute extra properties (the minimum load only considers the hours with load, i.e. zeros are masked out)
+    building_demands = building_demands.replace(np.nan, 0.0)
+    demands = building_demands.to_numpy(dtype='f8')
+    loaded = demands > 0
+    max_load = demands.max(0)
+    min_load = np.where(loaded, demands, np.inf).min(0)
+    min_load[~loaded.any(0)] = np.nan
+    max_load_series = pd.DataFrame({'Max_load_kWh': max_load}, index=building_demands.columns)
+    min_cap_opp = pd.DataFrame({'Min_Cap_opp': np.divide(min_load, max_load, out=np.full_like(min_load, np.nan),
+                                                         where=max_load > 0)}, index=building_demands.columns)
     building_properties = building_properties.merge(max_load_series, left_index=True, right_index=True)
     building_properties = building_properties.merge(min_cap_opp, left_index=True, right_index=True)
     building_properties.head()
 
-    building_demands = pd.concat([building_demands], ignore_index=True)
-    building_demands['time'] = building_demands.index.values
-
     # agreagate thermal loads
-    group_demand_dict = {}
-
-    for i, row in building_groups_ct.iterrows():
-        building_list = row['Buildings'].split(",")
-        demand = np.zeros(building_demands.shape[0])
-        for building in building_list:
-            demand += building_demands[building].values
-        group_demand_dict[row['Group']] = demand
-    group_demand_df = pd.DataFrame(group_demand_dict)
+    group_demand_df = get_group_demands(building_demands, building_groups_ct)
 
     # Size cooling towers per group
-    def find_upper_neighbours(value, df, colname):
-        exactmatch = df[df[colname] == value]
-        if not exactmatch.empty:
-            return exactmatch.index
-        else:
-            lowerneighbour_ind = df[df[colname] < value][colname].idxmax()
-            upperneighbour_ind = df[df[colname] > value][colname].idxmin()
-            upperneighbour = df[colname][upperneighbour_ind]
-            return upperneighbour
-
-    BldgToCTs = {}
-    for (group, demand) in group_demand_df.items():
-        peak = max(demand)
-        average = np.mean(demand.replace(0, np.NaN))
-        baseload = BASE_CT_THRESHOLD * peak
-        peak_unit_size = peak - average
-        intermediate_unit_size = average - baseload
-        base_unit_size = baseload
-
-        # checks
-        if peak_unit_size > CT_catalog['Capacity [kW]'].min():
-            peak_unit_size = find_upper_neighbours(peak_unit_size, CT_catalog, 'Capacity [kW]')
-        else:
-            peak_unit_size = CT_catalog['Capacity [kW]'].min()
-
-        if intermediate_unit_size > CT_catalog['Capacity [kW]'].min():
-            intermediate_unit_size = find_upper_neighbours(intermediate_unit_size, CT_catalog, 'Capacity [kW]')
-        else:
-            intermediate_unit_size = CT_catalog['Capacity [kW]'].min()
-
-        if base_unit_size > CT_catalog['Capacity [kW]'].min():
-            base_unit_size = find_upper_neighbours(base_unit_size, CT_catalog, 'Capacity [kW]')
-        else:
-            base_unit_size = CT_catalog['Capacity [kW]'].min()
-
-        BldgToCTs[group] = peak_unit_size, intermediate_unit_size, base_unit_size
+    # Catalog capacities sorted once, to look up the upper neighbour of each unit size by binary search
+    capacities = np.sort(CT_catalog['Capacity [kW]'].to_numpy())
+
+    # Unit sizes of all groups at once (the average only considers the hours with load)
+    group_demands = group_demand_df.to_numpy()
+    peak = group_demands.max(0, initial=0.0)
+    average = group_demands.sum(0) / np.maximum((group_demands > 0).sum(0), 1)
+    baseload = BASE_CT_THRESHOLD * peak
+    unit_sizes = np.stack([peak - average, average - baseload, baseload])  # (peak, intermediate, base) x groups
+
+    # checks: each unit is the smallest catalog CT that covers its size (at least the smallest, at most the
+    # largest CT of the catalog)
+    unit_idx = np.searchsorted(capacities, np.nan_to_num(unit_sizes), side='left')
+    oversized = (unit_idx == len(capacities)).any(0)
+    if oversized.any():
+        oversized_groups = ', '.join(map(str, group_demand_df.columns[oversized]))
+        warnings.warn("The cooling tower units of the groups {} are larger than the largest CT of the catalog ({} kW), "
+                      "which will be considered instead.".format(oversized_groups, capacities[-1]))
+    unit_idx = np.minimum(unit_idx, len(capacities) - 1)
+
+    BldgToCTs = dict(zip(group_demand_df.columns, map(tuple, capacities[unit_idx].T.tolist())))
 
     if group_demand_df.empty:
         print('There are no buildings with cooling towers, therefore the Heat Rejection model will not be activated.')
@@ -222,54 +289,51 @@ def main(config):
         waterflow = res['water flow']
         HWT = res['HWT']
         waterflow = res['return water flow']
-        T_drybulb_out = res['air_o']
-        T_drybulb_out.columns = CT_design['ID']
 
         # Output results and save
-        sensible_share_ct = pd.DataFrame()
-        latent_share_ct = pd.DataFrame()
-
-        # Get the split between sensible and latent heat
-        for cooling_tower in res['air_o'].columns:
-            sensible_share = list()
-            latent_share = list()
-            for i in range(0, len(air_i)):
-                sensible_share.append((HumidAir.sensible_latent_heat_split(air_i[i], res['air_o'][cooling_tower][i]))[0])
-                latent_share.append((HumidAir.sensible_latent_heat_split(air_i[i], res['air_o'][cooling_tower][i]))[1])
-            sensible_share_ct[cooling_tower] = sensible_share
-            latent_share_ct[cooling_tower] = latent_share
-
-        sensible_share_group = pd.DataFrame(columns=group_demand_df.columns)
-        latent_share_group = pd.DataFrame(columns=group_demand_df.columns)
-
-        # Average the results for the 3 Cooling Towers for each group
-        for i, group in enumerate(group_demand_df.columns):
-            cooling_towers = [f"CT{i*3 + j}" for j in range(3)]
-            sensible_share_group[group] = sensible_share_ct[cooling_towers].mean(axis=1)
-            latent_share_group[group] = latent_share_ct[cooling_towers].mean(axis=1)
+        # Get the split between sensible and latent heat (time x CT), ambient states broadcast over the CTs
+        sensible_share, latent_share = HumidAir.sensible_latent_heat_split_vec(
+            getstate('TDryBulb', air_i)[:, np.newaxis],
+            getstate('HumRatio', air_i)[:, np.newaxis],
+            getstate('h_moist', air_i)[:, np.newaxis],
+            res['air_o'].TDryBulb,
+            res['air_o'].HumRatio,
+            res['air_o'].h_moist)
+
+        # Average the results for the 3 Cooling Towers for each group (CTs are ordered by group, 3 per group)
+        shape_group_ct = (sensible_share.shape[0], group_demand_df.shape[1], 3)  # time x group x CT of the group
+        sensible_share_group = pd.DataFrame(sensible_share.reshape(shape_group_ct).mean(axis=2),
+                                            columns=group_demand_df.columns)
+        latent_share_group = pd.DataFrame(latent_share.reshape(shape_group_ct).mean(axis=2),
+                                          columns=group_demand_df.columns)
 
         # Save outputs
         year = weather['year'][0]
+        # formatted to text once (as to_csv would do for every group file)
+        dates = get_date_range_hours_from_year(year).strftime('%Y-%m-%d %H:%M:%S')
+        Q_reject_kWh = group_demand_df
+        Q_reject_sens_kWh = group_demand_df.mul(sensible_share_group)
+        Q_reject_lat_kWh = group_demand_df.mul(latent_share_group)
+        group_buildings = dict(zip(building_groups_ct.Group, building_groups_ct.Buildings))
+        get_heat_rejection_folder = locator._ensure_folder(locator.scenario, 'outputs', 'data', 'heat_rejection')
+
+        output_files = {}
         for group in building_groups_ct.Group:
-            Q_reject_kWh = group_demand_df
-            if group in list(building_groups_ct.Group):
-                Q_reject_sens_kWh = group_demand_df.mul(sensible_share_group)
-                Q_reject_lat_kWh = group_demand_df.mul(latent_share_group)
-            else:
-                Q_reject_sens_kWh = group_demand_df
-                Q_reject_lat_kWh = group_demand_df*0
-            building = building_groups.loc[building_groups.Group == group].Buildings
-
             output = pd.DataFrame()
-            output['Buildings'] = list(building)*len(Q_reject_kWh)
-            output['Date'] = get_date_range_hours_from_year(year)
-            output['Q_reject_kWh'] = Q_reject_kWh[group]
-            output['Q_reject_sens_kWh'] = Q_reject_sens_kWh[group]
-            output['Q_reject_lat_kWh'] = Q_reject_lat_kWh[group]
+            output['Buildings'] = [group_buildings[group]] * len(Q_reject_kWh)
+            output['Date'] = dates
+            output['Q_reject_kWh'] = Q_reject_kWh[group].to_numpy()
+            output['Q_reject_sens_kWh'] = Q_reject_sens_kWh[group].to_numpy()
+            output['Q_reject_lat_kWh'] = Q_reject_lat_kWh[group].to_numpy()
 
-            get_heat_rejection_folder = locator._ensure_folder(locator.scenario, 'outputs', 'data', 'heat_rejection')
             # output.to_csv(os.path.join(get_heat_rejection_folder,group+'_'+str(np.array(building)[0])+'.csv')) #to save groups with building names (removed because can get too long)
-            output.to_csv(os.path.join(get_heat_rejection_folder, group + '.csv'), index=False)
+            output_files[os.path.join(get_heat_rejection_folder, group + '.csv')] = output
+
+        # the group files are independent, so they are written in parallel
+        with ThreadPoolExecutor(max_workers=IO_WORKERS) as executor:
+            futures = [executor.submit(output.to_csv, path, index=False) for path, output in output_files.items()]
+            for future in futures:
+                future.result()
         print('Heat Rejection calculation is finished, check heat_rejection in data folder (outputs)')
 
 
@@ -19,6 +19,8 @@ print('psychrolib initialized to SI units')
 
 import numpy as np
 import warnings
+from collections import namedtuple
+from numba import njit, prange
 
 # CONSTANTS
 c_ = {
@@ -31,6 +33,9 @@ water = {
     'cp vapor 375 K': 1890,  # J/kg-K
     'h vap 0°C': 2501 * 1000,  # J/kg
 }
+dryair = {
+    'R': 287.042,  # J/kg-K, specific gas constant of dry air (ASHRAE, as in psychrolib)
+}
 
 
 class HumidAir:
@@ -151,6 +156,43 @@ class HumidAir:
         # return deltah_SH, deltah_LH, LH_coeff_err
         return percentage_SH, percentage_LH
 
+    @staticmethod
+    def sensible_latent_heat_split_vec(T_i, w_i, h_i, T_f, w_f, h_f):
+        """Vectorized sensible_latent_heat_split(). Instead of humidair instances, this takes the state variables of
+        the initial and final states of air as numpy arrays (broadcastable against each other), such that the split
+        of e.g. a whole (time x CT) table is computed in one call.
+
+        PARAMETERS:
+            T_i, T_f            Dry bulb temperature [C] of the initial and final states of air
+            w_i, w_f            Humidity ratio [kg/kg da] of the initial and final states of air
+            h_i, h_f            Moist air enthalpy [J/kg da] of the initial and final states of air
+
+        RETURNS:
+            percentage_SH       Share of sensible heat [0, 1] as np array
+            percentage_LH       Share of latent heat [0, 1] as np array
+
+        The method is the same as in sensible_latent_heat_split(). A single warning is issued with the largest
+        relative error of LH, if it goes beyond 2%.
+        """
+        # ........................................................ 1) Setup utils
+        c_pv = water['cp vapor 275 K']  # J/kg-K
+        h_vap = water['h vap 0°C']  # J/kg
+
+        LH_coeff = lambda T: c_pv * T + h_vap  # J/kg
+
+        # ........................................................ 2) Error due to unknown temp of humidification
+        LH_coeff_err = (LH_coeff(T_f) - LH_coeff(T_i)) / LH_coeff(T_i)
+
+        if np.any(LH_coeff_err > 0.02):
+            warnings.warn('The large temperature difference causes a relative error of up to {:0.1f}% in the latent '
+                          'heat calculation'.format(np.max(LH_coeff_err) * 100))
+
+        # ........................................................ 3) Calc LH, SH (compiled kernel, on flat arrays)
+        shape, flat = _flatten(T_i, w_i, h_i, T_f, w_f, h_f)
+        percentage_SH, percentage_LH = _sensible_latent_heat_split(*flat, c_pv, h_vap)
+
+        return percentage_SH.reshape(shape), percentage_LH.reshape(shape)
+
     def __repr__(self):
         return "Humid air at {:0.2f} °C, {:0.3f} RH".format(self.TDryBulb, self.RelHum)
 
@@ -175,6 +217,68 @@ class HumidAir:
         self.h_moist = psy.GetMoistAirEnthalpy(self.TDryBulb, self.HumRatio)
 
 
+class AirState(namedtuple('AirState', ('TDryBulb', 'TWetBulb', 'TDewPoint', 'P', 'VapPres', 'HumRatio', 'RelHum',
+                                       'DegreeofSaturation', 'h_moist', 'h_dry', 'MoistAirVolume'))):
+    """Humid air states of many air streams, as a struct of arrays: each field is a numpy array (same shape for all
+    fields) of the state variable of the same name in HumidAir. Access a state with getattr(air, state)."""
+    __slots__ = ()
+
+    @classmethod
+    def fromseq(cls, airseq, idx=None):
+        """Collects the states of the sequence of humidair objects. If given, idx is an integer array (any shape)
+        of positions in airseq, such that e.g. a (time x CT) table is built from a few unique states."""
+        states = (getstate(_field, airseq) for _field in cls._fields)
+
+        if idx is None:
+            return cls(*states)
+        return cls(*(_x[idx] for _x in states))
+
+    @classmethod
+    def fixstatefr_Tdb_RH_P(cls, TDryBulb, RelHum, P=c_['Patm']):
+        """Fixes the states from arrays of dry bulb temp [C] and relative humidity [0,1] (broadcastable against each
+        other) at pressure P [Pa], i.e. the same as HumidAir.fixstatefr_Tdb_RH_P() but for many states at once,
+        without humidair objects (compiled, same results as psychrolib)."""
+        shape, (T, RH) = _flatten(TDryBulb, RelHum)
+        w = get_HumRatio_vec(T, RH, P)
+
+        states = {
+            'TDryBulb': T,
+            'TWetBulb': get_TWetBulb_vec(T, w, P),
+            'TDewPoint': get_TDewPoint_vec(T, w, P),
+            'P': np.full(T.shape, float(P)),
+            'HumRatio': w,
+            'RelHum': RH,
+        }
+        for _state in ('VapPres', 'DegreeofSaturation', 'h_moist', 'h_dry', 'MoistAirVolume'):
+            states[_state] = getstate_vec(_state, T, w, P)
+
+        return cls(**{_field: _x.reshape(shape) for _field, _x in states.items()})
+
+    def select(self, key):
+        """Indexes all the fields with key (e.g. air_o.select((slice(None), 0)) for the 1st CT of a time x CT
+        table), and returns the result as AirState."""
+        return AirState(*(_x[key] for _x in self))
+
+
+@njit(cache=True, parallel=True)
+def _sensible_latent_heat_split(T_i, w_i, h_i, T_f, w_f, h_f, c_pv, h_vap):
+    """Compiled kernel of HumidAir.sensible_latent_heat_split_vec(). All the state variables are 1d float arrays of
+    equal length; returns the sensible and latent heat shares as 1d arrays."""
+    n = T_i.shape[0]
+    percentage_SH = np.zeros(n)
+    percentage_LH = np.zeros(n)
+
+    for idx in prange(n):
+        deltah_LH = (c_pv * 0.5 * (T_f[idx] + T_i[idx]) + h_vap) * (w_f[idx] - w_i[idx])  # J/kg da
+        deltah_SH = h_f[idx] - h_i[idx] - deltah_LH
+
+        if deltah_LH > 0 and deltah_SH > 0:
+            percentage_SH[idx] = deltah_SH / (deltah_SH + deltah_LH)
+            percentage_LH[idx] = deltah_LH / (deltah_SH + deltah_LH)
+
+    return percentage_SH, percentage_LH
+
+
 def liqwater_h(T, To=0):
     """Calculates the specific enthalpy [J/kg] of liquid water at atmospheric pressure, for a given temperature (
     Celsius).
@@ -189,3 +293,258 @@ def liqwater_h(T, To=0):
 def getstate(state, airseq):
     "Extracts the specified state from the sequence of humid air objects as a numpy array"
     return np.fromiter((getattr(_air, state) for _air in airseq), dtype='f8')
+
+
+_R_DA = dryair['R']  # global float, frozen into the compiled code
+_MIN_HUM_RATIO = 1e-07  # lower bound of the humidity ratio, as in psychrolib
+_TOLERANCE = 0.001  # of the iterative solutions of the wet bulb and dew point temps [C], as in psychrolib (SI)
+_MAX_ITER_COUNT = 100
+
+# Integer codes of the state variables that getstate_vec() can calculate from the dry bulb temp and humidity ratio
+STATE_KEYS = {
+    'TDryBulb': 0,
+    'HumRatio': 1,
+    'h_moist': 2,
+    'h_dry': 3,
+    'MoistAirVolume': 4,
+    'VapPres': 5,
+    'RelHum': 6,
+    'DegreeofSaturation': 7,
+}
+
+
+def _flatten(*arrays):
+    """Broadcasts the arrays against each other. Returns the common shape, and the arrays as flat float arrays (as
+    taken by the compiled kernels)."""
+    shape = np.broadcast_shapes(*(np.shape(_x) for _x in arrays))
+    return shape, tuple(np.ascontiguousarray(np.broadcast_to(_x, shape), dtype='f8').ravel() for _x in arrays)
+
+
+def getstate_vec(state, TDryBulb, HumRatio, P=c_['Patm']):
+    """Calculates the specified state from arrays of dry bulb temp [C] and humidity ratio [kg/kg da], i.e. the same
+    as getstate() but without humidair objects. The arrays must be broadcastable against each other; only the states
+    in STATE_KEYS are supported (state can be given as the name or its integer code), otherwise a KeyError is
+    raised. The formulas are those of psychrolib (SI)."""
+    if state in STATE_KEYS:
+        key = STATE_KEYS[state]
+    elif isinstance(state, (int, np.integer)) and state in STATE_KEYS.values():
+        key = state
+    else:
+        raise KeyError('getstate_vec() does not support the state {!r}. Supported states: {}'.format(
+            state, ', '.join(STATE_KEYS)))
+
+    shape, (T, w) = _flatten(TDryBulb, HumRatio)
+    return _getstate_vec(key, T, w, float(P)).reshape(shape)
+
+
+def get_HumRatio_vec(TDryBulb, RelHum, P=c_['Patm']):
+    """Calculates the humidity ratio [kg/kg da] from arrays of dry bulb temp [C] and relative humidity [0,1]
+    (broadcastable against each other), as psychrolib.GetHumRatioFromRelHum."""
+    shape, (T, RH) = _flatten(TDryBulb, RelHum)
+    if np.any((RH < 0) | (RH > 1)):
+        raise ValueError("Relative humidity is outside range [0, 1]")
+    return _map_hum_ratio(T, RH, float(P)).reshape(shape)
+
+
+def get_TDewPoint_vec(TDryBulb, HumRatio, P=c_['Patm']):
+    """Calculates the dew point temp [C] from arrays of dry bulb temp [C] and humidity ratio [kg/kg da]
+    (broadcastable against each other), as psychrolib.GetTDewPointFromHumRatio. Raises a ValueError if the solution
+    is out of the range of validity or did not converge for any of the states (as psychrolib)."""
+    shape, (T, w) = _flatten(TDryBulb, HumRatio)
+    if np.any(w < 0):
+        raise ValueError("Humidity ratio cannot be negative")
+    return _check_converged(_map_tdewpoint(T, w, float(P)), 'get_TDewPoint_vec').reshape(shape)
+
+
+def get_TWetBulb_vec(TDryBulb, HumRatio, P=c_['Patm']):
+    """Calculates the wet bulb temp [C] from arrays of dry bulb temp [C] and humidity ratio [kg/kg da]
+    (broadcastable against each other), as psychrolib.GetTWetBulbFromHumRatio. Raises a ValueError if the solution
+    is out of the range of validity or did not converge for any of the states (as psychrolib)."""
+    shape, (T, w) = _flatten(TDryBulb, HumRatio)
+    if np.any(w < 0):
+        raise ValueError("Humidity ratio cannot be negative")
+    return _check_converged(_map_twetbulb(T, w, float(P)), 'get_TWetBulb_vec').reshape(shape)
+
+
+def _check_converged(out, name):
+    """The compiled iterative solutions return NaN where psychrolib would raise."""
+    if np.isnan(out).any():
+        raise ValueError('{}(): out of the range of validity, or convergence not reached for {} of the {} '
+                         'states.'.format(name, np.count_nonzero(np.isnan(out)), out.size))
+    return out
+
+
+# ---------------------------------------------------------------------------------------- Compiled psychrometric core
+# Pure float functions (SI units), following psychrolib. They are the scalar building blocks of the kernels below.
+@njit(cache=True)
+def _sat_vap_pres(T):
+    """Saturation vapor pressure [Pa] over ice (below the triple point) or liquid water (psychrolib.GetSatVapPres)"""
+    T_K = T + 273.15
+
+    if T <= 0.01:
+        LnPws = -5.6745359E+03 / T_K + 6.3925247 - 9.677843E-03 * T_K + 6.2215701E-07 * T_K ** 2 \
+                + 2.0747825E-09 * T_K ** 3 - 9.484024E-13 * T_K ** 4 + 4.1635019 * np.log(T_K)
+    else:
+        LnPws = -5.8002206E+03 / T_K + 1.3914993 - 4.8640239E-02 * T_K + 4.1764768E-05 * T_K ** 2 \
+                - 1.4452093E-08 * T_K ** 3 + 6.5459673 * np.log(T_K)
+
+    return np.exp(LnPws)
+
+
+@njit(cache=True)
+def _hum_ratio_from_vap_pres(Pv, P):
+    """Humidity ratio [kg/kg da] (psychrolib.GetHumRatioFromVapPres)"""
+    return max(0.621945 * Pv / (P - Pv), _MIN_HUM_RATIO)
+
+
+@njit(cache=True)
+def _moist_air_enthalpy(T, w):
+    """Moist air enthalpy [J/kg da] (psychrolib.GetMoistAirEnthalpy)"""
+    return (1.006 * T + w * (2501. + 1.86 * T)) * 1000
+
+
+@njit(cache=True)
+def _moist_air_volume(T, w, P):
+    """Specific volume of moist air [m3/kg da] (psychrolib.GetMoistAirVolume)"""
+    return _R_DA * (T + 273.15) * (1 + 1.607858 * w) / P
+
+
+@njit(cache=True)
+def _vap_pres(w, P):
+    """Partial pressure of water vapor [Pa] (psychrolib.GetVapPresFromHumRatio)"""
+    return P * w / (0.621945 + w)
+
+
+@njit(cache=True)
+def _dlnpws(T):
+    """Derivative of the log of the saturation vapor pressure wrt. temp [1/K] (psychrolib.dLnPws_)"""
+    T_K = T + 273.15
+
+    if T <= 0.01:
+        return 5.6745359E+03 / T_K ** 2 - 9.677843E-03 + 2 * 6.2215701E-07 * T_K + 3 * 2.0747825E-09 * T_K ** 2 \
+               - 4 * 9.484024E-13 * T_K ** 3 + 4.1635019 / T_K
+    return 5.8002206E+03 / T_K ** 2 - 4.8640239E-02 + 2 * 4.1764768E-05 * T_K - 3 * 1.4452093E-08 * T_K ** 2 \
+           + 6.5459673 / T_K
+
+
+@njit(cache=True)
+def _tdewpoint(T, w, P):
+    """Dew point temp [C] by Newton-Raphson (psychrolib.GetTDewPointFromHumRatio). NaN where psychrolib raises."""
+    Pv = _vap_pres(max(w, _MIN_HUM_RATIO), P)
+
+    # Bounds outside which a solution cannot be found
+    if Pv < _sat_vap_pres(-100.) or Pv > _sat_vap_pres(200.):
+        return np.nan
+
+    lnVP = np.log(Pv)
+    Tdp = T  # first guess
+
+    for _ in range(_MAX_ITER_COUNT + 1):
+        Tdp_iter = Tdp
+        Tdp = Tdp_iter - (np.log(_sat_vap_pres(Tdp_iter)) - lnVP) / _dlnpws(Tdp_iter)
+        Tdp = min(max(Tdp, -100.), 200.)
+
+        if abs(Tdp - Tdp_iter) <= _TOLERANCE:
+            return min(Tdp, T)
+
+    return np.nan
+
+
+@njit(cache=True)
+def _hum_ratio_from_twetbulb(T, Twb, P):
+    """Humidity ratio [kg/kg da] from the dry and wet bulb temps (psychrolib.GetHumRatioFromTWetBulb)"""
+    Wsstar = _hum_ratio_from_vap_pres(_sat_vap_pres(Twb), P)
+
+    if Twb >= 0.:
+        w = ((2501. - 2.326 * Twb) * Wsstar - 1.006 * (T - Twb)) / (2501. + 1.86 * T - 4.186 * Twb)
+    else:
+        w = ((2830. - 0.24 * Twb) * Wsstar - 1.006 * (T - Twb)) / (2830. + 1.86 * T - 2.1 * Twb)
+
+    return max(w, _MIN_HUM_RATIO)
+
+
+@njit(cache=True)
+def _twetbulb(T, w, P):
+    """Wet bulb temp [C] by bisection between the dew point and dry bulb temps (psychrolib.GetTWetBulbFromHumRatio).
+    NaN where psychrolib raises."""
+    w = max(w, _MIN_HUM_RATIO)
+    Twb_sup = T
+    Twb_inf = _tdewpoint(T, w, P)
+    Twb = (Twb_inf + Twb_sup) / 2
+
+    if np.isnan(Twb_inf):
+        return np.nan
+
+    index = 1
+    while Twb_sup - Twb_inf > _TOLERANCE:
+        if _hum_ratio_from_twetbulb(T, Twb, P) > w:
+            Twb_sup = Twb
+        else:
+            Twb_inf = Twb
+        Twb = (Twb_sup + Twb_inf) / 2
+
+        if index >= _MAX_ITER_COUNT:
+            return np.nan
+        index += 1
+
+    return Twb
+
+
+@njit(cache=True, parallel=True)
+def _map_hum_ratio(T, RH, P):
+    """Compiled kernel of get_HumRatio_vec()"""
+    out = np.empty(T.shape[0])
+    for idx in prange(T.shape[0]):
+        out[idx] = _hum_ratio_from_vap_pres(RH[idx] * _sat_vap_pres(T[idx]), P)
+    return out
+
+
+@njit(cache=True, parallel=True)
+def _map_tdewpoint(T, w, P):
+    """Compiled kernel of get_TDewPoint_vec()"""
+    out = np.empty(T.shape[0])
+    for idx in prange(T.shape[0]):
+        out[idx] = _tdewpoint(T[idx], w[idx], P)
+    return out
+
+
+@njit(cache=True, parallel=True)
+def _map_twetbulb(T, w, P):
+    """Compiled kernel of get_TWetBulb_vec()"""
+    out = np.empty(T.shape[0])
+    for idx in prange(T.shape[0]):
+        out[idx] = _twetbulb(T[idx], w[idx], P)
+    return out
+
+
+@njit(cache=True, parallel=True)
+def _getstate_vec(key, T, w, P):
+    """Compiled kernel of getstate_vec(). T and w are 1d float arrays of equal length; key is from STATE_KEYS."""
+    n = T.shape[0]
+    out = np.empty(n)
+
+    for idx in prange(n):
+        # Bounded as in psychrolib
+        w_idx = max(w[idx], _MIN_HUM_RATIO)
+
+        if key == 0:
+            out[idx] = T[idx]
+        elif key == 1:
+            out[idx] = w[idx]
+        elif key == 2:
+            out[idx] = _moist_air_enthalpy(T[idx], w_idx)
+        elif key == 3:
+            out[idx] = 1006 * T[idx]
+        elif key == 4:
+            out[idx] = _moist_air_volume(T[idx], w_idx, P)
+        elif key == 5:
+            out[idx] = _vap_pres(w_idx, P)
+        elif key == 6:
+            out[idx] = _vap_pres(w_idx, P) / _sat_vap_pres(T[idx])
+        elif key == 7:
+            out[idx] = w_idx / _hum_ratio_from_vap_pres(_sat_vap_pres(T[idx]), P)
+        else:
+            # Unknown key (getstate_vec() validates it)
+            out[idx] = np.nan
+
+    return out
@@ -14,6 +14,7 @@ Version:    Early
 """
 # Python
 from os import path
+import warnings
 
 import numpy as np
 # Scipy ecosystem
@@ -21,7 +22,7 @@ import pandas as pd
 # More 3rd party
 from pint import UnitRegistry
 
-from cea_heat_rejection_plugin.utilities.DK_thermo import water, c_, HumidAir, getstate, liqwater_h
+from cea_heat_rejection_plugin.utilities.DK_thermo import water, c_, HumidAir, AirState, getstate, liqwater_h
 
 ureg = UnitRegistry()
 Q_ = ureg.Quantity
@@ -76,7 +77,11 @@ def set_ambient(TDryBulb, RelHumidity, Pressure=c_['Patm']):
     if len(TDryBulb) != len(RelHumidity):
         raise ValueError("Parameters 'TDryBulb' and 'RelHumidity' must be of the same length.")
 
-    air_i = tuple(HumidAir.fixstatefr_Tdb_RH_P(_T, _RH, P=Pressure) for _T, _RH in zip(TDryBulb, RelHumidity))
+    # Weather data repeats the same (T, RH) pairs many times (e.g. EPW files are given at 0.1 °C and 1% RH), so the
+    # state is only fixed once per unique pair and shared by all the hours with that pair.
+    unique_T_RH, inverse = np.unique(np.column_stack((TDryBulb, RelHumidity)), axis=0, return_inverse=True)
+    unique_air = tuple(HumidAir.fixstatefr_Tdb_RH_P(_T, _RH, P=Pressure) for _T, _RH in unique_T_RH)
+    air_i = tuple(unique_air[idx] for idx in inverse.ravel())
     WBT = np.fromiter((_air.TWetBulb for _air in air_i), dtype='f8')
 
     return air_i, WBT
@@ -302,7 +307,7 @@ def _calc_HeatTransfer(CT_design, air_i, HWT, CWT, waterflow, fan_ctrl, exhaust_
         airflow             Air mass flow rate (time x CT) (pint kg/s)
         ret_waterflow       Output water stream flow rate (time x CT) (pint kg/s)
 
-        air_o               DataFrame (time x CT with range index) of the exhaust humid air objects
+        air_o               AirState of the exhaust air, with all states as (time x CT) arrays
                             Note: At no-load conditions, this maps to the appropriate ambient air conditions.
 
         thermo              Dictionary of the thermodynamic states (all time x CT as pint 2d arrays):
@@ -336,37 +341,20 @@ def _calc_HeatTransfer(CT_design, air_i, HWT, CWT, waterflow, fan_ctrl, exhaust_
 
     if fan_ctrl:
         # ...................................................... c-i) w/ control
-        h4 = np.empty(_shape)
-        w4 = np.empty(_shape)
+        # i) Get state 4 (struct of time x CT arrays)
+        # a) No-load --> set to ambient
+        loaded = h1.magnitude != h2.magnitude
+        ignore_div_0 = not loaded.all()
+        air_o = AirState.fromseq(air_i, np.broadcast_to(np.arange(nTime)[:, np.newaxis], _shape))
 
-        # Compact storage of exhaust air states, to prevent redundant state-fixing
-        air_o_cmpt = {}
-        # DataFrame (time x CT range index)
-        air_o = pd.DataFrame(index=pd.RangeIndex(_shape[0]), columns=pd.RangeIndex(_shape[1]))
+        # b) Loaded --> set T4 = HWT at assumed RH (all states fixed at once)
+        air_4 = AirState.fixstatefr_Tdb_RH_P(HWT.magnitude[loaded], exhaust_RH, P=c_['Patm'])
+        for _x, _x4 in zip(air_o, air_4):
+            _x[loaded] = _x4
 
-        for t_idx in range(_shape[0]):
-            for CT_idx in range(_shape[1]):
-                # i) Get state 4
-                # a) No-load --> set to ambient
-                if h1[t_idx, CT_idx] == h2[t_idx, CT_idx]:
-                    _air = air_i[t_idx]
-                    ignore_div_0 = True
-
-                # b) Loaded --> set T4 = HWT at assumed RH
-                else:
-                    TRH_key = (HWT[t_idx, CT_idx].magnitude, exhaust_RH)
-
-                    if TRH_key not in air_o_cmpt:
-                        air_o_cmpt[TRH_key] = HumidAir.fixstatefr_Tdb_RH_P(*TRH_key, P=c_['Patm'])
-
-                    _air = air_o_cmpt[TRH_key]
-
-                # ii) Get enthalpy and humidity ratio
-                h4[t_idx, CT_idx] = _air.h_moist
-                w4[t_idx, CT_idx] = _air.HumRatio
-
-                # iii) map to air_o (DataFrame)
-                air_o.at[t_idx, CT_idx] = _air
+        # ii) Get enthalpy and humidity ratio
+        h4 = air_o.h_moist
+        w4 = air_o.HumRatio
 
         # Convert to Pint
         h4 = Q_(h4, 'J/kg')
@@ -436,13 +424,8 @@ def _calc_AirFlow(CT_design, air_o, airflow):
 
 
 def get_exhaust_air_state(state, air_o, units=None):
-    """Returns a 2d-array (time x CT) of the specified state of air_o"""
-    nTime, nCT = air_o.shape
-
-    # This works too but is less elegant / more difficult to read
-    # air_o_states = np.fromiter((getattr(air_o.iat[i, j], state) for i in range(nTime) for j in range(nCT)),
-    #                            dtype='f8').reshape((nTime, nCT))
-    air_o_states = np.array([[getattr(air_o.iat[i, j], state) for j in range(nCT)] for i in range(nTime)])
+    """Returns a 2d-array (time x CT) of the specified state of air_o (AirState)"""
+    air_o_states = getattr(air_o, state)
 
     if units:
         air_o_states = Q_(air_o_states, units)
@@ -469,58 +452,65 @@ def parse_BldgToCTs(BldgToCTs, CT_catalog):
         CTs DataFrame, which has the same structure as CT_catalog, whose rows correspond to the CTs of the bldgs (
         ordered as they appear per bldg, as well as for all bldgs).
     """
-    AllCTs = pd.DataFrame(columns=CT_catalog.columns, dtype='f8')  # the index actually doesn't matter
+    CT_kWs = [CT_kW for CTs_of_bldgT in BldgToCTs.values() for CT_kW in CTs_of_bldgT]
 
-    for CTs_of_bldgT in BldgToCTs.values():
-        for CT_kW in CTs_of_bldgT:
-            AllCTs.loc[AllCTs.shape[0], :] = CT_catalog.loc[CT_kW, :]
+    # Selected in one go (instead of appending row by row); the index actually doesn't matter
+    AllCTs = CT_catalog.loc[CT_kWs, :].astype('f8').reset_index(drop=True)
 
     return AllCTs
 
 
-def find_upper_neighbours(value, df, colname):
-    exactmatch = df[df[colname] == value]
-    if not exactmatch.empty:
-        return exactmatch.index
-    else:
-        lowerneighbour_ind = df[df[colname] < value][colname].idxmax()
-        upperneighbour_ind = df[df[colname] > value][colname].idxmin()
-        upperneighbour = df[colname][upperneighbour_ind]
-        return upperneighbour
+def find_upper_neighbours(value, capacities):
+    """Returns the smallest of the (sorted) capacities that is equal to or above value. Values beyond the largest
+    capacity are clipped to it."""
+    return capacities[min(np.searchsorted(capacities, value, side='left'), len(capacities) - 1)]
 
 
 def size_cooling_tower(group_demand_df, CT_catalog, BASE_CT_THRESHOLD, OVERDIMENSIONING_THRESHOLD):
+    # Catalog capacities, sorted once for find_upper_neighbours()
+    capacities = np.sort(CT_catalog['Capacity [kW]'].to_numpy())
+    cap_min = capacities[0]
+
     BldgToCTs = {}
-    for (group, demand) in group_demand_df.items():
-        peak = max(demand)
+    oversized = []
+    group_demands = group_demand_df.to_numpy()
+    for j, group in enumerate(group_demand_df.columns):
+        demand = group_demands[:, j]
+        peak = demand.max()
 
         # every CT has three main units
         # 1. a base unit
         baseload = BASE_CT_THRESHOLD * peak
         base_unit_size = baseload * (1 + OVERDIMENSIONING_THRESHOLD)
         # 2. a intermediate unit
-        average = np.mean(demand.replace(0, np.NaN))
+        average = demand[demand > 0].sum() / max(np.count_nonzero(demand > 0), 1)  # mean of the loaded hours
         intermediate_unit_size = (average - baseload) * (1 + OVERDIMENSIONING_THRESHOLD)
         # 3. a peak unit
         peak_unit_size = (peak - average) * (1 + OVERDIMENSIONING_THRESHOLD)
 
         # checks
-        if peak_unit_size > CT_catalog['Capacity [kW]'].min():
-            peak_unit_size = find_upper_neighbours(peak_unit_size, CT_catalog, 'Capacity [kW]')
+        if max(peak_unit_size, intermediate_unit_size, base_unit_size) > capacities[-1]:
+            oversized.append(group)  # clipped to the largest CT by find_upper_neighbours()
+        if peak_unit_size > cap_min:
+            peak_unit_size = find_upper_neighbours(peak_unit_size, capacities)
         else:
-            peak_unit_size = CT_catalog['Capacity [kW]'].min()
+            peak_unit_size = cap_min
 
-        if intermediate_unit_size > CT_catalog['Capacity [kW]'].min():
-            intermediate_unit_size = find_upper_neighbours(intermediate_unit_size, CT_catalog, 'Capacity [kW]')
+        if intermediate_unit_size > cap_min:
+            intermediate_unit_size = find_upper_neighbours(intermediate_unit_size, capacities)
         else:
-            intermediate_unit_size = CT_catalog['Capacity [kW]'].min()
+            intermediate_unit_size = cap_min
 
-        if base_unit_size > CT_catalog['Capacity [kW]'].min():
-            base_unit_size = find_upper_neighbours(base_unit_size, CT_catalog, 'Capacity [kW]')
+        if base_unit_size > cap_min:
+            base_unit_size = find_upper_neighbours(base_unit_size, capacities)
         else:
-            base_unit_size = CT_catalog['Capacity [kW]'].min()
+            base_unit_size = cap_min
 
         BldgToCTs[group] = peak_unit_size, intermediate_unit_size, base_unit_size
+
+    if oversized:
+        warnings.warn("The cooling tower units of the groups {} are larger than the largest CT of the catalog ({} kW), "
+                      "which will be considered instead.".format(', '.join(map(str, oversized)), capacities[-1]))
     return BldgToCTs
 
 
@@ -1,15 +1,135 @@
-from os import path
+import importlib
+from pathlib import Path
 
-import matplotlib.pyplot as plt
+import numpy as np
 
-from cea_heat_rejection_plugin.utilities.DK_thermo import getstate
-from cea_heat_rejection_plugin.utilities.coolingtowers import PathProj
+# matplotlib (and the project paths in coolingtowers) are only imported once a plot is made, so that importing this
+# module stays cheap for runs that never plot.
+_plt = None
+# Pyplot-free figure reused (cleared) by the saved plots made with kwargs['reuse_fig'] (batch runs), instead of
+# creating a figure per plot
+_reusable_fig = None
+# Folder of the saved plots, resolved (and created) on the first save
+_PLOT_DIR = None
 
-PathPlots = path.join(PathProj, 'Results', 'Plots')
+
+# Default labels, by humidair state and load [pu]
+_YLABELS = {
+    'TDryBulb': 'Temp (dry bulb) [°C]',
+    'HumRatio': '[kg vapor/kg d.a.]',
+}
+_TITLES_STATE = {
+    'TDryBulb': 'Dry Bulb Temperature',
+    'HumRatio': 'Humidity Ratio',
+}
+_TITLES_STATE_VS_LOAD = dict(_TITLES_STATE, TDryBulb='Temperature')
+_TITLES_LOAD = {
+    1: 'Full',
+    0: 'No',
+}
+_SETPOINT_LINE = {'ls': '--', 'lw': 1, 'color': 'k'}
+
+
+def _lazy_plt():
+    """Returns matplotlib.pyplot, importing it on first use. It is only needed for the figures to be shown, and uses
+    the user's default backend (matplotlib falls back to Agg by itself if there is no display)."""
+    global _plt
+    if _plt is None:
+        _plt = importlib.import_module('matplotlib.pyplot')
+    return _plt
+
+
+def _new_fig(save, **fig_kw):
+    """Returns a new figure. Figures to be saved (batch runs) are plain matplotlib Figures, not managed by pyplot:
+    savefig renders them with Agg, without any GUI window or backend set-up. The others are pyplot figures, such that
+    they can be shown."""
+    if save:
+        from matplotlib.figure import Figure
+        return Figure(**fig_kw)
+    return _lazy_plt().figure(**fig_kw)
+
+
+def _savepath(name):
+    """Returns the path to save the plot name at, in the plots folder (Results/Plots in the project folder). The
+    folder is created on first use, if it does not exist yet."""
+    global _PLOT_DIR
+    if _PLOT_DIR is None:
+        from cea_heat_rejection_plugin.utilities.coolingtowers import PathProj
+        _PLOT_DIR = Path(PathProj) / 'Results' / 'Plots'
+        _PLOT_DIR.mkdir(parents=True, exist_ok=True)
+    return _PLOT_DIR / name
+
+
+def _plot_lines(ax, x, ys, colors, labels, **kwargs):
+    """Draws the series ys (each against x) as a single LineCollection, i.e. one artist for all the lines. As the
+    collection has no per-line labels, the legend (if kwargs['legend']) is made of proxy lines."""
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+
+    colors = colors[:len(ys)]
+    ax.add_collection(LineCollection([np.column_stack((x, y)) for y in ys], colors=colors, rasterized=True))
+    ax.autoscale()
+
+    if kwargs.get('legend'):
+        handles = [Line2D([], [], color=color, label=label) for color, label in zip(colors, labels)]
+        ax.legend(handles=handles, **kwargs.get('legend_kw', {}))
+
+
+def _get_fig(figsize, save, reuse):
+    """Returns a new figure of size figsize, except for saved plots made with reuse (batch runs, where the caller does
+    not keep the figures): these draw on the module's pyplot-free figure, cleared and resized on each use. Hence,
+    figures that are shown or kept by the caller are never cleared by a later plot."""
+    global _reusable_fig
+    if not (save and reuse):
+        return _new_fig(save, figsize=figsize)
+
+    if _reusable_fig is None:
+        _reusable_fig = _new_fig(True, figsize=figsize)
+    else:
+        _reusable_fig.clear()
+        _reusable_fig.set_size_inches(*figsize)
+
+    return _reusable_fig
+
+
+def _get_fig_ax(ax, figsize, save, reuse):
+    """Returns the (figure, axes) to plot on: a figure from _get_fig() if ax is None, else the given axes and its
+    figure."""
+    if ax is None:
+        fig = _get_fig(figsize, save, reuse)
+        return fig, fig.add_subplot(111)
+    return ax.figure, ax
+
+
+def _draw_setpoint(ax, setpoint, x_text, label, line_kw):
+    """Draws the set point as a horizontal line, labelled at x_text just above the line (or below it, if the label
+    would be too close to the top of the axes)."""
+    ax.axhline(setpoint, **line_kw)
+
+    # Text label
+    y_lb, y_ub = ax.get_ylim()
+    text_y = setpoint + 0.03 * (y_ub - y_lb)
+    if text_y > y_ub * 0.95: text_y = setpoint - 0.03 * (y_ub - y_lb)
+
+    ax.text(x_text, text_y, label)
+
+
+def _finish(fig, own_fig, save_as, **kwargs):
+    """Saves the figure (if save_as), and returns it. A figure created by the plot function (own_fig) that is not
+    saved is shown unless kwargs['show'] is False. Saved figures are not managed by pyplot (see _new_fig()), so there
+    is nothing to close. Figures of axes passed by the caller are left open, i.e. showing them is the caller's
+    responsibility."""
+    if save_as:
+        fig.savefig(_savepath(save_as), dpi=kwargs.get('dpi'), bbox_inches='tight')
+
+    elif own_fig and kwargs.get('show', True):
+        _lazy_plt().show()
+
+    return fig
 
 
 def plt_AmbientAirPerformance_exhaust(state, results, Tin, RH_values, pu_load, pump_ctrl, plot_setpoint=False,
-                                      save_as=None, **kwargs):
+                                      save_as=None, ax=None, **kwargs):
     """Plots the ambient air performance -- exhaust air state vs. T ambient
 
     This plots the target variable vs T ambient parametrized by RH.
@@ -18,7 +138,8 @@ def plt_AmbientAirPerformance_exhaust(state, results, Tin, RH_values, pu_load, p
         state           State of humidair (currently support: TDryBulb and HumRatio)
 
         results         Dict of {pump_ctrl, RH, *: val}, where * are the standard keys in simulate_CT(); and val
-                        are the results objects returned.
+                        are the results objects returned. The 'air_o' values are AirState of 1d arrays (e.g. one CT
+                        selected with AirState.select()).
 
         Tin             The sequence of ambient air temperatures [°C] (independent variable)
 
@@ -34,195 +155,173 @@ def plt_AmbientAirPerformance_exhaust(state, results, Tin, RH_values, pu_load, p
                         respectively.
 
 
-        kwargs          Plot kwargs
+        ax              (Optional) Axes to plot on, e.g. one panel of a larger figure. If not given, a new figure
+                        is created.
+
+        kwargs          Plot kwargs. The figure is shown if not saved (with matplotlib's default backend), unless
+                        'show' is False. Saved figures are rendered without pyplot, i.e. no window is opened. If ax
+                        is given, showing the figure is left to the caller. With 'reuse_fig' (for batch runs that
+                        save many plots), a saved plot draws on a figure shared by the module instead of a new one.
+
+    Returns the figure, e.g. to modify it further. With 'reuse_fig', a saved plot returns the shared figure, which is
+    cleared by the next such plot.
     """
-    def_ylabels = {
-        'TDryBulb': 'Temp (dry bulb) [°C]',
-        'HumRatio': '[kg vapor/kg d.a.]',
-    }
-    def_titles = {
-        'TDryBulb': 'Dry Bulb Temperature',
-        'HumRatio': 'Humidity Ratio',
-        1: 'Full',
-        0: 'No',
-    }
     def_kwargs = {
-        'title': 'Exhaust {} at {} Load'.format(def_titles.get(state, '*'),
-                                                def_titles.get(pu_load, '{:0.1f}%'.format(pu_load * 100))),
-        'ylabel': '{}'.format(def_ylabels.get(state, '*')),
+        'title': 'Exhaust {} at {} Load'.format(_TITLES_STATE.get(state, '*'),
+                                                _TITLES_LOAD.get(pu_load, '{:0.1f}%'.format(pu_load * 100))),
+        'ylabel': '{}'.format(_YLABELS.get(state, '*')),
         'xlabel': 'Ambient Temp (dry bulb) [°C]',
-        'setpoint_line': {'ls': '--', 'lw': 1, 'color': 'k'},
+        'setpoint_line': _SETPOINT_LINE,
     }
-
-    kwargs.update({key: val for key, val in def_kwargs.items() if key not in kwargs})
-    kwargs.update({key: val for key, val in common_def_kwargs.items() if key not in kwargs})
+    for key, val in def_kwargs.items(): kwargs.setdefault(key, val)
+    for key, val in common_def_kwargs.items(): kwargs.setdefault(key, val)
 
     RH_color_seq = ('#2E86C1', '#16A085', '#D35400')
 
     # ----------------------------------------------------- PLOT
-    plt.figure(figsize=kwargs['figsize'])
-    for idx, RH in enumerate(RH_values):
-        plt.plot(Tin, getstate(state, results[pump_ctrl, RH, 'air_o']),
-                 label='{:0.2f} RH'.format(RH), color=RH_color_seq[idx])
+    # Exhaust states, as plain float arrays
+    ys = [getattr(results[pump_ctrl, RH, 'air_o'], state) for RH in RH_values]
+
+    own_fig = ax is None
+    fig, ax = _get_fig_ax(ax, kwargs['figsize'], bool(save_as), kwargs['reuse_fig'])
+    _plot_lines(ax, Tin, ys, RH_color_seq, ['{:0.2f} RH'.format(RH) for RH in RH_values], **kwargs)
 
-    ax = plt.gca()
     # ax = basic_plot_polishing(ax, **kwargs)
 
     if plot_setpoint:
         setpoint = kwargs[{'TDryBulb': 'T_sp', 'HumRatio': 'w_sp'}[state]]
-        ax.axhline(setpoint, **kwargs['setpoint_line'])
-
-        # Text label
-        y_lb, y_ub = ax.get_ylim()
-        text_y = setpoint + 0.03 * (y_ub - y_lb)
-        if text_y > y_ub * 0.95: text_y = setpoint - 0.03 * (y_ub - y_lb)
-
-        plt.text(Tin.min(), text_y, 'set point')
+        _draw_setpoint(ax, setpoint, Tin.min(), 'set point', kwargs['setpoint_line'])
 
-    if save_as:
-        plt.savefig(path.join(PathPlots, save_as), dpi=kwargs.get('dpi'))
-
-    plt.show()
-    return
+    return _finish(fig, own_fig, save_as, **kwargs)
 
 
 def plt_AmbientAirPerformance_airflow(results, Tin, RH_values, pu_load, pump_ctrl, plot_setpoint=True, save_as=None,
-                                      **kwargs):
+                                      ax=None, **kwargs):
     """Plots the ambient air performance -- air flow vs. T ambient"""
     def_kwargs = {
-        'title': 'Air Mass Flow at {} Load'.format({1: 'Full', 0: 'No'}.get(pu_load, '{:0.1f}%'.format(pu_load * 100))),
+        'title': 'Air Mass Flow at {} Load'.format(_TITLES_LOAD.get(pu_load, '{:0.1f}%'.format(pu_load * 100))),
         'ylabel': '[kg/s]',
         'xlabel': 'Temp (dry bulb) [°C]',
-        'setpoint_line': {'ls': '--', 'lw': 1, 'color': 'k'},
+        'setpoint_line': _SETPOINT_LINE,
     }
-    kwargs.update({key: val for key, val in def_kwargs.items() if key not in kwargs})
-    kwargs.update({key: val for key, val in common_def_kwargs.items() if key not in kwargs})
+    for key, val in def_kwargs.items(): kwargs.setdefault(key, val)
+    for key, val in common_def_kwargs.items(): kwargs.setdefault(key, val)
 
     RH_color_seq = ('#2E86C1', '#16A085', '#D35400')
 
     # ----------------------------------------------------- PLOT
-    plt.figure(figsize=kwargs['figsize'])
+    # Air flows (without units), as plain float arrays
+    ys = [np.asarray(results[pump_ctrl, RH, 'air flow'].magnitude) for RH in RH_values]
 
-    for idx, RH in enumerate(RH_values):
-        plt.plot(Tin, results[pump_ctrl, RH, 'air flow'].magnitude,
-                 label='{:0.2f} RH'.format(RH), color=RH_color_seq[idx])
+    own_fig = ax is None
+    fig, ax = _get_fig_ax(ax, kwargs['figsize'], bool(save_as), kwargs['reuse_fig'])
+    _plot_lines(ax, Tin, ys, RH_color_seq, ['{:0.2f} RH'.format(RH) for RH in RH_values], **kwargs)
 
-    ax = plt.gca()
     # ax = basic_plot_polishing(ax, **kwargs)
 
     if plot_setpoint:
-        setpoint = kwargs['airflow_sp']
-        ax.axhline(setpoint, **kwargs['setpoint_line'])
-
-        # Text label
-        y_lb, y_ub = ax.get_ylim()
-        text_y = setpoint + 0.03 * (y_ub - y_lb)
-        if text_y > y_ub * 0.95: text_y = setpoint - 0.03 * (y_ub - y_lb)
-
-        plt.text(Tin.min(), text_y, 'nominal')
-
-    if save_as:
-        plt.savefig(path.join(PathPlots, save_as), dpi=kwargs.get('dpi'))
+        _draw_setpoint(ax, kwargs['airflow_sp'], Tin.min(), 'nominal', kwargs['setpoint_line'])
 
-    plt.show()
-    return
+    return _finish(fig, own_fig, save_as, **kwargs)
 
 
 def plt_LoadingPerformance_exhaust(state, results, CT_load, air_i, pump_ctrl, plot_setpoint=True, save_as=None,
-                                   **kwargs):
+                                   ax=None, **kwargs):
     """Plots the loading performance -- exhaust vs. load kW"""
-    def_ylabels = {
-        'TDryBulb': 'Temp (dry bulb) [°C]',
-        'HumRatio': '[kg vapor/kg d.a.]',
-    }
-    def_titles = {
-        'TDryBulb': 'Temperature',
-        'HumRatio': 'Humidity Ratio',
-    }
     def_kwargs = {
         'xlabel': 'heat load [kW]',
-        'ylabel': '{}'.format(def_ylabels.get(state, '*')),
-        'title': 'Exhaust {} vs. Load'.format(def_titles.get(state, '*')),
-        'setpoint_line': {'ls': '--', 'lw': 1, 'color': 'k'},
+        'ylabel': '{}'.format(_YLABELS.get(state, '*')),
+        'title': 'Exhaust {} vs. Load'.format(_TITLES_STATE_VS_LOAD.get(state, '*')),
+        'setpoint_line': _SETPOINT_LINE,
     }
-    kwargs.update({key: val for key, val in def_kwargs.items() if key not in kwargs})
-    kwargs.update({key: val for key, val in common_def_kwargs.items() if key not in kwargs})
+    for key, val in def_kwargs.items(): kwargs.setdefault(key, val)
+    for key, val in common_def_kwargs.items(): kwargs.setdefault(key, val)
 
     RH_color_seq = ('#2E86C1', '#16A085', '#D35400')
 
     # ----------------------------------------------------- PLOT
-    plt.figure(figsize=kwargs['figsize'])
-
-    for idx, _air_i in enumerate(air_i):
-        _T, _RH = _air_i.TDryBulb, _air_i.RelHum
-        plt.plot(CT_load.magnitude, getstate(state, results[_T, _RH, pump_ctrl, 'air_o']),
-                 label='{:0.1f}°C, {:0.3f} RH'.format(_T, _RH), color=RH_color_seq[idx])
+    # Load (without units) and exhaust states, as plain float arrays
+    x = np.asarray(CT_load.magnitude)
+    ys = [getattr(results[_air_i.TDryBulb, _air_i.RelHum, pump_ctrl, 'air_o'], state) for _air_i in air_i]
 
-    ax = plt.gca()
+    own_fig = ax is None
+    fig, ax = _get_fig_ax(ax, kwargs['figsize'], bool(save_as), kwargs['reuse_fig'])
+    _plot_lines(ax, x, ys, RH_color_seq,
+                ['{:0.1f}°C, {:0.3f} RH'.format(_air_i.TDryBulb, _air_i.RelHum) for _air_i in air_i], **kwargs)
 
     # ax = basic_plot_polishing(ax, **kwargs)
 
     if plot_setpoint:
         setpoint = kwargs[{'TDryBulb': 'T_sp', 'HumRatio': 'w_sp'}[state]]
-        ax.axhline(setpoint, **kwargs['setpoint_line'])
+        _draw_setpoint(ax, setpoint, 0, 'set point', kwargs['setpoint_line'])
 
-        # Text label
-        y_lb, y_ub = ax.get_ylim()
-        text_y = setpoint + 0.03 * (y_ub - y_lb)
-        if text_y > y_ub * 0.95: text_y = setpoint - 0.03 * (y_ub - y_lb)
+    return _finish(fig, own_fig, save_as, **kwargs)
 
-        plt.text(0, text_y, 'set point')
 
-    if save_as:
-        plt.savefig(path.join(PathPlots, save_as), dpi=kwargs.get('dpi'))
-
-    plt.show()
-    return
-
-
-def plt_LoadingPerformance_airflow(results, CT_load, air_i, pump_ctrl, plot_setpoint=True, save_as=None, **kwargs):
+def plt_LoadingPerformance_airflow(results, CT_load, air_i, pump_ctrl, plot_setpoint=True, save_as=None, ax=None,
+                                   **kwargs):
     """Plots the loading performance -- air flow vs. load kW"""
     def_kwargs = {
         'xlabel': 'heat load [kW]',
         'ylabel': '[kg/s]',
         'title': 'Air Mass Flow vs. Load',
-        'setpoint_line': {'ls': '--', 'lw': 1, 'color': 'k'},
+        'setpoint_line': _SETPOINT_LINE,
     }
-    kwargs.update({key: val for key, val in def_kwargs.items() if key not in kwargs})
-    kwargs.update({key: val for key, val in common_def_kwargs.items() if key not in kwargs})
+    for key, val in def_kwargs.items(): kwargs.setdefault(key, val)
+    for key, val in common_def_kwargs.items(): kwargs.setdefault(key, val)
 
     RH_color_seq = ('#2E86C1', '#16A085', '#D35400')
 
     # ----------------------------------------------------- PLOT
-    plt.figure(figsize=kwargs['figsize'])
+    # Load and air flows (without units), as plain float arrays
+    x = np.asarray(CT_load.magnitude)
+    ys = [np.asarray(results[_air_i.TDryBulb, _air_i.RelHum, pump_ctrl, 'air flow'].magnitude) for _air_i in air_i]
 
-    for idx, _air_i in enumerate(air_i):
-        _T, _RH = _air_i.TDryBulb, _air_i.RelHum
-        plt.plot(CT_load.magnitude, results[_T, _RH, pump_ctrl, 'air flow'].magnitude,
-                 label='{:0.1f}°C, {:0.3f} RH'.format(_T, _RH), color=RH_color_seq[idx])
+    own_fig = ax is None
+    fig, ax = _get_fig_ax(ax, kwargs['figsize'], bool(save_as), kwargs['reuse_fig'])
+    _plot_lines(ax, x, ys, RH_color_seq,
+                ['{:0.1f}°C, {:0.3f} RH'.format(_air_i.TDryBulb, _air_i.RelHum) for _air_i in air_i], **kwargs)
 
-    ax = plt.gca()
     # ax = basic_plot_polishing(ax, **kwargs)
 
     if plot_setpoint:
-        setpoint = kwargs['airflow_sp']
-        ax.axhline(setpoint, **kwargs['setpoint_line'])
+        _draw_setpoint(ax, kwargs['airflow_sp'], 0, 'nominal', kwargs['setpoint_line'])
 
-        # Text label
-        y_lb, y_ub = ax.get_ylim()
-        text_y = setpoint + 0.03 * (y_ub - y_lb)
-        if text_y > y_ub * 0.95: text_y = setpoint - 0.03 * (y_ub - y_lb)
+    return _finish(fig, own_fig, save_as, **kwargs)
 
-        plt.text(0, text_y, 'nominal')
 
-    if save_as:
-        plt.savefig(path.join(PathPlots, save_as), dpi=kwargs.get('dpi'))
+def plt_performance_summary(state, results, Tin, RH_values, pu_load, CT_load, air_i, pump_ctrl, plot_setpoint=True,
+                            save_as=None, **kwargs):
+    """Plots the four performance plots as panels of one figure (saved at once):
+
+        top             plt_AmbientAirPerformance_exhaust(), plt_AmbientAirPerformance_airflow()
+        bottom          plt_LoadingPerformance_exhaust(), plt_LoadingPerformance_airflow()
+
+    The parameters are those of the four plot functions. kwargs are passed to all of them (e.g. the set points
+    'T_sp' or 'w_sp', and 'airflow_sp', required if plot_setpoint), except 'figsize' which is that of the whole
+    figure (defaults to (14, 10)). Unlike the single plots, this makes a new figure, which is shown if not saved,
+    unless 'show' is False.
+
+    Returns the figure.
+    """
+    kwargs.setdefault('figsize', (14, 10))
+    fig = _new_fig(bool(save_as), figsize=kwargs['figsize'], constrained_layout=True)
+    axs = fig.subplots(2, 2)
 
-    plt.show()
-    return
+    plt_AmbientAirPerformance_exhaust(state, results, Tin, RH_values, pu_load, pump_ctrl, plot_setpoint=plot_setpoint,
+                                      ax=axs[0, 0], **kwargs)
+    plt_AmbientAirPerformance_airflow(results, Tin, RH_values, pu_load, pump_ctrl, plot_setpoint=plot_setpoint,
+                                      ax=axs[0, 1], **kwargs)
+    plt_LoadingPerformance_exhaust(state, results, CT_load, air_i, pump_ctrl, plot_setpoint=plot_setpoint,
+                                   ax=axs[1, 0], **kwargs)
+    plt_LoadingPerformance_airflow(results, CT_load, air_i, pump_ctrl, plot_setpoint=plot_setpoint, ax=axs[1, 1],
+                                   **kwargs)
 
+    for key, val in common_def_kwargs.items(): kwargs.setdefault(key, val)
+    return _finish(fig, True, save_as, **kwargs)
 
-def plt_ExhaustSpeeds(results, CT_selection, load_levels_pu, amb_T_RH, pump_ctrl, save_as=None, **kwargs):
+
+def plt_ExhaustSpeeds(results, CT_selection, load_levels_pu, amb_T_RH, pump_ctrl, save_as=None, ax=None, **kwargs):
     """Plots the exhaust speeds of multiple CTs (intended for the largest CT per fan size)"""
     def_kwargs = {
         'xlabel': 'Load [%]',
@@ -230,33 +329,29 @@ def plt_ExhaustSpeeds(results, CT_selection, load_levels_pu, amb_T_RH, pump_ctrl
         'title': 'Exhaust Air Speed vs. Load',
         'legend_kw': {'loc': 'lower right', 'title': 'CT size and fan diameter'},
     }
-    kwargs.update({key: val for key, val in def_kwargs.items() if key not in kwargs})
-    kwargs.update({key: val for key, val in common_def_kwargs.items() if key not in kwargs})
+    for key, val in def_kwargs.items(): kwargs.setdefault(key, val)
+    for key, val in common_def_kwargs.items(): kwargs.setdefault(key, val)
 
     nCT = CT_selection.shape[0]
     CT_color_seq = ('#5499C7', '#52BE80', '#F39C12', '#E74C3C', '#8E44AD', '#839192', '#2E4053')
     Tamb, RHamb = amb_T_RH
 
     # ----------------------------------------------------- PLOT
-    plt.figure(figsize=kwargs['figsize'])
-
-    for CTidx in range(nCT):
-        plt.plot(load_levels_pu * 100, results[Tamb, RHamb, pump_ctrl, 'exhaust speed'][:, CTidx].magnitude,
-                 label='{} kW, {} m'.format(CT_selection['Capacity [kW]'].iat[CTidx],
-                                            CT_selection['Fan diameter [m]'].iat[CTidx]),
-                 color=CT_color_seq[CTidx], )
-
-    ax = plt.gca()
+    # Load [%] and exhaust speeds (time x CT, without units), as plain float arrays
+    load_x = load_levels_pu * 100
+    speeds = np.asarray(results[Tamb, RHamb, pump_ctrl, 'exhaust speed'].magnitude)
+    labels = ['{} kW, {} m'.format(_kW, _dia) for _kW, _dia in zip(CT_selection['Capacity [kW]'].values[:nCT],
+                                                                    CT_selection['Fan diameter [m]'].values[:nCT])]
+
+    own_fig = ax is None
+    fig, ax = _get_fig_ax(ax, kwargs['figsize'], bool(save_as), kwargs['reuse_fig'])
+    _plot_lines(ax, load_x, [speeds[:, CTidx] for CTidx in range(nCT)], CT_color_seq, labels, **kwargs)
     # ax = basic_plot_polishing(ax, **kwargs)
-    plt.text(0.86, 0.42, 'Ambient Conditions', fontdict={'fontweight': 0}, horizontalalignment='center',
-             transform=ax.transAxes)
-    plt.text(0.86, 0.37, '{}°C, {} RH'.format(Tamb, RHamb), horizontalalignment='center', transform=ax.transAxes)
-
-    if save_as:
-        plt.savefig(path.join(PathPlots, save_as), dpi=kwargs.get('dpi'))
+    ax.text(0.86, 0.42, 'Ambient Conditions', fontdict={'fontweight': 0}, horizontalalignment='center',
+            transform=ax.transAxes)
+    ax.text(0.86, 0.37, '{}°C, {} RH'.format(Tamb, RHamb), horizontalalignment='center', transform=ax.transAxes)
 
-    plt.show()
-    return
+    return _finish(fig, own_fig, save_as, **kwargs)
 
 
 common_def_kwargs = {
@@ -268,4 +363,5 @@ common_def_kwargs = {
     'yticks_kw': {'fontsize': 11},
     'title_kw': {'fontsize': 13},
     'dpi': 300,
+    'reuse_fig': False,
 }
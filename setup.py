@@ -1,4 +1,4 @@
-from setuptools import setup, find_packages
+from setuptools import setup
 
 __version__ = "1.0.0"
 
@@ -8,7 +8,7 @@ setup(name='cea_heat_rejection_plugin',
       license='MIT',
       author="Cooling Singapore (Luis Santos, Reynold Mok, Jimeno Fonseca)",
       url='https://github.com/cooling-singapore/cea-heat-rejection-plugin',
-      packages=find_packages(),
+      packages=['cea_heat_rejection_plugin', 'cea_heat_rejection_plugin.utilities'],
       package_data={},
       install_requires=[
           'pint',
@@ -16,6 +16,6 @@ setup(name='cea_heat_rejection_plugin',
           'psychrolib',
           'numpy',
           'matplotlib',
-          'geopandas',
+          'numba',
       ],
       include_package_data=True)
@@ -0,0 +1,71 @@
+"""Checks the compiled humid air states of DK_thermo against psychrolib (via HumidAir objects)"""
+import numpy as np
+import pytest
+
+from cea_heat_rejection_plugin.utilities.DK_thermo import HumidAir, AirState, STATE_KEYS, getstate, getstate_vec, \
+    get_HumRatio_vec, get_TDewPoint_vec, get_TWetBulb_vec
+
+T_VALUES = np.linspace(-20, 60, 41)
+RH_VALUES = np.linspace(0.05, 1, 41)
+
+
+@pytest.fixture(scope='module')
+def airseq():
+    return [HumidAir.fixstatefr_Tdb_RH_P(_T, _RH) for _T, _RH in zip(T_VALUES, RH_VALUES)]
+
+
+@pytest.mark.parametrize('state', list(STATE_KEYS))
+def test_getstate_vec_matches_psychrolib(state, airseq):
+    expected = getstate(state, airseq)
+    assert np.allclose(getstate_vec(state, T_VALUES, getstate('HumRatio', airseq)), expected, rtol=1e-12, atol=0)
+    assert np.array_equal(getstate_vec(STATE_KEYS[state], T_VALUES, getstate('HumRatio', airseq)),
+                          getstate_vec(state, T_VALUES, getstate('HumRatio', airseq)))
+
+
+def test_iterative_states_vec_match_psychrolib(airseq):
+    HumRatio = get_HumRatio_vec(T_VALUES, RH_VALUES)
+    assert np.array_equal(HumRatio, getstate('HumRatio', airseq))
+    assert np.array_equal(get_TDewPoint_vec(T_VALUES, HumRatio), getstate('TDewPoint', airseq))
+    assert np.array_equal(get_TWetBulb_vec(T_VALUES, HumRatio), getstate('TWetBulb', airseq))
+
+
+def test_airstate_fixstatefr_Tdb_RH_P_matches_humidair(airseq):
+    air = AirState.fixstatefr_Tdb_RH_P(T_VALUES.reshape(-1, 1), RH_VALUES.reshape(-1, 1))
+    expected = AirState.fromseq(airseq, np.arange(len(airseq)).reshape(-1, 1))
+    for _field in AirState._fields:
+        assert np.array_equal(getattr(air, _field), getattr(expected, _field)), _field
+
+
+def test_iterative_states_vec_reject_invalid_inputs():
+    with pytest.raises(ValueError):
+        get_HumRatio_vec([30.], [1.1])
+    with pytest.raises(ValueError):
+        get_TDewPoint_vec([30.], [-0.01])
+
+
+def test_getstate_vec_broadcasts():
+    assert getstate_vec('h_moist', np.array([[25.], [30.]]), np.array([0.01, 0.02, 0.03])).shape == (2, 3)
+
+
+@pytest.mark.parametrize('state', ['TWetBulb', 'TDewPoint', 'P', 'typo', 42, -1])
+def test_getstate_vec_rejects_unsupported_states(state):
+    with pytest.raises(KeyError):
+        getstate_vec(state, [30.], [0.02])
+
+
+def test_sensible_latent_heat_split_vec_matches_scalar(airseq):
+    # (time x 1) initial states vs (time x CT) final states; the final states of the 2nd CT are drier/cooler than the
+    # initial ones, i.e. the deltah_LH <= 0 / deltah_SH <= 0 branch (zero split)
+    air_f = np.array([[HumidAir.fixstatefr_Tdb_RH_P(air.TDryBulb + 5, min(air.RelHum + 0.1, 1)),
+                       HumidAir.fixstatefr_Tdb_RH_P(air.TDryBulb - 5, air.RelHum / 2)] for air in airseq])
+    air_i = np.array(airseq)[:, np.newaxis]
+    states = lambda air: [getstate(_state, air.ravel()).reshape(air.shape)
+                          for _state in ('TDryBulb', 'HumRatio', 'h_moist')]
+
+    percentage_SH, percentage_LH = HumidAir.sensible_latent_heat_split_vec(*states(air_i), *states(air_f))
+    expected = np.vectorize(HumidAir.sensible_latent_heat_split, otypes=['f8', 'f8'])(air_i, air_f)
+
+    assert percentage_SH.shape == percentage_LH.shape == air_f.shape
+    assert np.array_equal(percentage_SH, expected[0]) and np.array_equal(percentage_LH, expected[1])
+    assert (percentage_SH[:, 1] == 0).all() and (percentage_LH[:, 1] == 0).all()
+    assert (percentage_SH[:, 0] > 0).any()